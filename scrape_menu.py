@@ -1,188 +1,448 @@
-import asyncio
-from playwright.async_api import async_playwright
-
-
-async def scrape_menu_images(google_maps_url: str) -> list[str]:
-    """
-    Scrapes all menu image URLs from a Google Maps place listing.
-    
-    Args:
-        google_maps_url: The Google Maps URL for the place
-        
-    Returns:
-        List of image URLs from the menu section
-    """
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        # Set a realistic user agent
-        context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        page = await context.new_page()
-        
-        try:
-            print(f"Navigating to: {google_maps_url}")
-            # Use 'load' instead of 'networkidle' - Google Maps has continuous network activity
-            await page.goto(google_maps_url, wait_until="load", timeout=60000)
-            await page.wait_for_timeout(5000)  # Wait for page to fully load
-            
-            # Handle potential cookie/popup dialogs
-            try:
-                # Try to dismiss any cookie consent or popups
-                accept_button = page.locator('button:has-text("Accept"), button:has-text("I agree"), [aria-label*="Accept"], [aria-label*="Dismiss"]').first
-                if await accept_button.is_visible(timeout=2000):
-                    await accept_button.click()
-                    await page.wait_for_timeout(1000)
-            except:
-                pass  # No popup found, continue
-            
-            # Click the "Menu" tab - try multiple selectors
-            print("Looking for Menu tab...")
-            menu_tab = None
-            
-            # Try different selectors for the Menu tab
-            selectors = [
-                ('role', 'tab', {'name': 'Menu'}),
-                ('text', 'Menu'),
-                ('css', 'button[data-value="Menu"]'),
-                ('css', '[role="tab"]:has-text("Menu")'),
-            ]
-            
-            for selector_type, selector, *kwargs in selectors:
-                try:
-                    if selector_type == 'role':
-                        menu_tab = page.get_by_role(selector, **kwargs[0] if kwargs else {})
-                    elif selector_type == 'text':
-                        menu_tab = page.get_by_text(selector)
-                    elif selector_type == 'css':
-                        menu_tab = page.locator(selector)
-                    
-                    if await menu_tab.is_visible(timeout=3000):
-                        print(f"Found Menu tab using {selector_type} selector")
-                        break
-                except:
-                    continue
-            
-            if not menu_tab or not await menu_tab.is_visible(timeout=2000):
-                # Debug: take a screenshot to see what's on the page
-                await page.screenshot(path="debug_screenshot.png")
-                print("⚠️  Menu tab not found. Saved debug_screenshot.png for inspection.")
-                print("Trying to find all tabs on the page...")
-                all_tabs = await page.evaluate("""
-                    () => {
-                        const tabs = Array.from(document.querySelectorAll('[role="tab"], button[data-value]'));
-                        return tabs.map(t => ({
-                            text: t.textContent?.trim(),
-                            dataValue: t.getAttribute('data-value'),
-                            ariaLabel: t.getAttribute('aria-label')
-                        }));
-                    }
-                """)
-                print(f"Found tabs: {all_tabs}")
-                await browser.close()
-                return []
-            
-            await menu_tab.click()
-            print("Clicked Menu tab")
-            await page.wait_for_timeout(4000)  # Wait for menu content to load
-            
-            # Scroll to load all menu images
-            print("Scrolling to load all menu images...")
-            last_height = 0
-            unchanged_count = 0
-            max_scrolls = 20  # Safety limit
-            
-            for scroll_attempt in range(max_scrolls):
-                # Get current scroll height
-                current_height = await page.evaluate("document.scrollingElement.scrollHeight")
-                
-                # Scroll down
-                await page.evaluate("window.scrollTo(0, document.scrollingElement.scrollHeight)")
-                await page.wait_for_timeout(1500)  # Wait for images to load
-                
-                # Check if we've reached the bottom
-                new_height = await page.evaluate("document.scrollingElement.scrollHeight")
-                if new_height == last_height:
-                    unchanged_count += 1
-                    if unchanged_count >= 2:
-                        break
-                else:
-                    unchanged_count = 0
-                    last_height = new_height
-                
-                # Also scroll within the menu section if there are horizontal scrolls
-                menu_section = page.locator('[data-value="Menu"]').locator('..')
-                if await menu_section.count() > 0:
-                    await menu_section.first().evaluate("element => element.scrollLeft = element.scrollWidth")
-            
-            print("Extracting image URLs...")
-            # Extract all image URLs
-            image_urls = await page.evaluate("""
-                () => {
-                    const images = Array.from(document.querySelectorAll('img'));
-                    return images.map(img => img.src || img.currentSrc || img.getAttribute('data-src'))
-                        .filter(url => url && url.startsWith('http'));
-                }
-            """)
-            
-            # Filter to Google-hosted images (menu photos are typically from googleusercontent.com)
-            menu_images = [
-                url for url in image_urls
-                if "googleusercontent.com" in url or "googleapis.com" in url
-            ]
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_images = []
-            for url in menu_images:
-                if url not in seen:
-                    seen.add(url)
-                    unique_images.append(url)
-            
-            print(f"✅ Found {len(unique_images)} unique menu image URLs")
-            await browser.close()
-            return unique_images
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            await browser.close()
-            raise
-
-
-async def main():
-    import sys
-    
-    # Get URL from command line argument or use default test URL
-    if len(sys.argv) > 1:
-        google_maps_url = sys.argv[1]
-    else:
-        # Default test URL
-        google_maps_url = "https://www.google.com/maps/place/CAVA/@33.5087058,-112.0458579,17z/data=!3m1!4b1!4m6!3m5!1s0x872b0dc8ef74aa11:0x4f3ccce4e3eb8f6e!8m2!3d33.5087058!4d-112.0458579!16s%2Fg%2F11rq8nl6lt?entry=ttu&g_ep=EgoyMDI1MTEyMy4xIKXMDSoASAFQAw%3D%3D"
-        print("Usage: python scrape_menu.py <google_maps_url>")
-        print("Using default test URL...\n")
-    
-    print("=" * 80)
-    print("Google Maps Menu Scraper")
-    print("=" * 80)
-    
-    urls = await scrape_menu_images(google_maps_url)
-    
-    print("\n" + "=" * 80)
-    print(f"Results: Found {len(urls)} menu image URLs")
-    print("=" * 80)
-    
-    for i, url in enumerate(urls, 1):
-        print(f"{i}. {url}")
-    
-    if len(urls) == 0:
-        print("\n⚠️  No menu images found. Possible reasons:")
-        print("   - The place doesn't have a Menu tab")
-        print("   - The menu section has no images")
-        print("   - The page structure may have changed")
-    
-    return urls
-
-
-if __name__ == "__main__":
-    asyncio.run(main())
-
+import asyncio
+import logging
+import os
+import re
+import time
+
+import httpx
+from playwright.async_api import Error as PlaywrightError, async_playwright
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Per-phase wall-clock so we know whether goto, tab-find, scroll or
+# extraction actually dominates before optimizing further
+_PHASE_SECONDS = Histogram(
+    "scrape_phase_seconds",
+    "Wall-clock seconds spent in each scrape phase",
+    labelnames=["phase"],
+)
+
+# Resource types we never need: we only extract img.src strings, so the
+# actual image bytes (and fonts/media/CSS) are wasted bandwidth
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+TRACKER_HOSTS = ("google-analytics", "doubleclick")
+
+# Hosts that serve Google place/menu photos; mirrors the in-page filter
+_MENU_HOST = re.compile(r"googleusercontent\.com|googleapis\.com")
+
+# Place IDs appear either as an explicit place_id/query_place_id param or
+# as the !1s... segment of the /maps/place/.../data= blob
+_PLACE_ID_PARAM = re.compile(r"(?:query_)?place_id=([A-Za-z0-9_-]+)")
+_PLACE_ID_DATA = re.compile(r"!1s(ChIJ[A-Za-z0-9_-]+)")
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Reusing a profile dir skips Chromium's first-run setup (HSTS preload,
+# disk cache init, SafeBrowsing DB unpack) and keeps the HTTP cache warm
+# across runs
+USER_DATA_DIR = "/tmp/playwright-profile"
+
+# Skip browser work a headless scraper never needs
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-background-networking",
+    "--disable-features=Translate,BackForwardCache",
+    "--disable-sync",
+]
+
+
+async def _block_nonessential(route):
+    """Abort downloads of non-essential resources and tracker requests."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    elif any(host in request.url for host in TRACKER_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def extract_place_id(google_maps_url: str) -> str | None:
+    """Pull the place ID out of a Google Maps URL, or None if absent."""
+    match = _PLACE_ID_PARAM.search(google_maps_url)
+    if not match:
+        match = _PLACE_ID_DATA.search(google_maps_url)
+    return match.group(1) if match else None
+
+
+async def fetch_menu_images_via_api(google_maps_url: str, api_key: str) -> list[str] | None:
+    """
+    Fetch place photo URLs from the Google Places API - one HTTP call
+    (~50ms) instead of a full browser session.
+
+    Returns the photo URLs, or None when the URL carries no place ID, the
+    API call fails, or the place has no photos - callers fall back to the
+    Playwright path in those cases.
+    """
+    place_id = extract_place_id(google_maps_url)
+    if not place_id:
+        return None
+
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(
+                f"https://places.googleapis.com/v1/places/{place_id}",
+                params={"fields": "photos"},
+                headers={"X-Goog-Api-Key": api_key},
+            )
+    except httpx.HTTPError as e:
+        print(f"⚠️  Places API request failed, falling back to scrape: {e}")
+        return None
+
+    if response.status_code != 200:
+        print(f"⚠️  Places API returned {response.status_code}, falling back to scrape")
+        return None
+
+    photos = response.json().get("photos", [])
+    if not photos:
+        return None
+
+    return [
+        f"https://places.googleapis.com/v1/{photo['name']}/media?maxWidthPx=1600&key={api_key}"
+        for photo in photos
+    ]
+
+
+async def scrape_menu_images(google_maps_url: str, browser=None) -> list[str]:
+    """
+    Scrapes all menu image URLs from a Google Maps place listing.
+
+    When GOOGLE_PLACES_API_KEY is set and the URL carries a place ID, the
+    official Places API is tried first - a single HTTP call instead of a
+    browser session. The Playwright path is the fallback.
+
+    Args:
+        google_maps_url: The Google Maps URL for the place
+        browser: An already-launched Playwright Browser to reuse. When given,
+            only a fresh BrowserContext is created per call (fast); when None,
+            a Chromium instance with a persistent profile is launched and
+            torn down for this call.
+
+    Returns:
+        List of image URLs from the menu section
+    """
+    api_key = os.getenv("GOOGLE_PLACES_API_KEY")
+    if api_key:
+        urls = await fetch_menu_images_via_api(google_maps_url, api_key)
+        if urls:
+            return urls
+
+    if browser is not None:
+        return await _scrape_with_browser(browser, google_maps_url)
+
+    async with async_playwright() as p:
+        context = await p.chromium.launch_persistent_context(
+            user_data_dir=USER_DATA_DIR,
+            headless=True,
+            user_agent=USER_AGENT,
+            args=CHROMIUM_ARGS,
+        )
+        try:
+            await context.route("**/*", _block_nonessential)
+            page = await context.new_page()
+            return await _scrape_on_page(page, google_maps_url)
+        finally:
+            await context.close()
+
+
+async def scrape_menu_images_batch(google_maps_urls, browser, max_concurrency=5):
+    """
+    Scrape several places concurrently as tabs in one shared context.
+
+    One BrowserContext serves all URLs - tabs share a cookie jar and a
+    renderer process pool, which costs far less memory than a context per
+    URL and allows a higher concurrency cap on the same box.
+
+    Args:
+        google_maps_urls: Google Maps URLs for the places
+        browser: An already-launched Playwright Browser
+        max_concurrency: How many tabs scrape at once
+
+    Returns:
+        One entry per input URL, in order: a list of image URLs on
+        success, or the raised exception for that URL.
+    """
+    context = await browser.new_context(user_agent=USER_AGENT)
+    await context.route("**/*", _block_nonessential)
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def one(url: str) -> list[str]:
+        async with sem:
+            page = await context.new_page()
+            try:
+                return await _scrape_on_page(page, url)
+            finally:
+                await page.close()
+
+    try:
+        return await asyncio.gather(
+            *[one(url) for url in google_maps_urls], return_exceptions=True
+        )
+    finally:
+        await context.close()
+
+
+async def _scrape_with_browser(browser, google_maps_url: str) -> list[str]:
+    """Run one scrape in a fresh context on an already-launched browser."""
+    # Set a realistic user agent; a fresh context gives clean cookies/storage
+    context = await browser.new_context(user_agent=USER_AGENT)
+    # The <img> elements still get their src attribute set even when the
+    # download is aborted, so URL extraction is unaffected
+    await context.route("**/*", _block_nonessential)
+    page = await context.new_page()
+
+    try:
+        return await _scrape_on_page(page, google_maps_url)
+    finally:
+        await context.close()
+
+
+async def _scrape_on_page(page, google_maps_url: str) -> list[str]:
+    """Drive one already-open page through the scrape and return image URLs."""
+    # Harvest photo URLs straight off the network as well: the route handler
+    # aborts image downloads but the request event still fires, so this
+    # catches lazy-loaded photos whose <img> the DOM extraction might miss
+    sniffed = []
+
+    def _on_request(request):
+        if request.resource_type == "image" and _MENU_HOST.search(request.url):
+            sniffed.append(request.url)
+
+    page.on("request", _on_request)
+
+    timings = {}
+    phase_start = time.perf_counter()
+
+    def _mark(phase):
+        nonlocal phase_start
+        now = time.perf_counter()
+        timings[phase] = round(now - phase_start, 3)
+        phase_start = now
+
+    try:
+        print(f"Navigating to: {google_maps_url}")
+        # Use 'domcontentloaded' - Google Maps has continuous network activity,
+        # so 'load' blocks on images/fonts/beacons we don't care about.
+        # Transient failures (DNS hiccup, 503) retry with backoff and a short
+        # per-attempt timeout rather than burning one long timeout and dying.
+        for attempt in range(3):
+            try:
+                await page.goto(google_maps_url, wait_until="domcontentloaded", timeout=20000)
+                break
+            except PlaywrightError as e:
+                if attempt == 2:
+                    raise
+                print(f"⚠️  Navigation failed (attempt {attempt + 1}/3), retrying: {e}")
+                await asyncio.sleep(3 ** attempt)
+        # Wait for the place UI to actually render instead of sleeping
+        await page.wait_for_selector('[role="tablist"], [role="main"]', timeout=30000)
+
+        # Handle potential cookie/popup dialogs
+        try:
+            # Try to dismiss any cookie consent or popups
+            accept_button = page.locator('button:has-text("Accept"), button:has-text("I agree"), [aria-label*="Accept"], [aria-label*="Dismiss"]').first
+            await accept_button.wait_for(state="visible", timeout=500)
+            await accept_button.click()
+        except:
+            pass  # No popup found, continue
+        _mark("goto")
+
+        # Click the "Menu" tab - race all known selectors at once so a
+        # missing tab costs one timeout budget, not one per selector
+        print("Looking for Menu tab...")
+        menu_tab = (
+            page.get_by_role('tab', name='Menu')
+            .or_(page.locator('button[data-value="Menu"]'))
+            .or_(page.locator('[role="tab"]:has-text("Menu")'))
+            .first
+        )
+        try:
+            await menu_tab.wait_for(state="visible", timeout=5000)
+            print("Found Menu tab")
+        except:
+            menu_tab = None
+
+        if not menu_tab:
+            # Debug: take a screenshot to see what's on the page
+            await page.screenshot(path="debug_screenshot.png")
+            print("⚠️  Menu tab not found. Saved debug_screenshot.png for inspection.")
+            print("Trying to find all tabs on the page...")
+            all_tabs = await page.evaluate("""
+                () => {
+                    const tabs = Array.from(document.querySelectorAll('[role="tab"], button[data-value]'));
+                    return tabs.map(t => ({
+                        text: t.textContent?.trim(),
+                        dataValue: t.getAttribute('data-value'),
+                        ariaLabel: t.getAttribute('aria-label')
+                    }));
+                }
+            """)
+            print(f"Found tabs: {all_tabs}")
+            return []
+        
+        await menu_tab.click()
+        print("Clicked Menu tab")
+        _mark("tab_find")
+        # Wait for the first menu photo instead of a fixed sleep
+        try:
+            await page.wait_for_selector('img[src*="googleusercontent"]', timeout=15000)
+        except:
+            pass  # Menu tab may have no photos; extraction below handles it
+
+        # Scroll to load all menu images. The whole loop runs inside the
+        # page in one evaluate() call: each Python-side iteration used to
+        # cost several CDP round-trips plus a fixed sleep, while in-browser
+        # a MutationObserver lets us advance the moment image loading settles.
+        print("Scrolling to load all menu images...")
+        await page.evaluate("""
+            async () => {
+                const el = document.scrollingElement;
+
+                // Resolve once no new <img> has been appended for 400 ms
+                const imagesSettled = () => new Promise(resolve => {
+                    let timer = setTimeout(done, 400);
+                    const observer = new MutationObserver(mutations => {
+                        const added = mutations.some(m =>
+                            [...m.addedNodes].some(n =>
+                                n.tagName === 'IMG' || n.querySelector?.('img')));
+                        if (added) {
+                            clearTimeout(timer);
+                            timer = setTimeout(done, 400);
+                        }
+                    });
+                    function done() { observer.disconnect(); resolve(); }
+                    observer.observe(document.body, {childList: true, subtree: true});
+                });
+
+                let lastHeight = 0;
+                let lastCount = 0;
+                let slowRounds = 0;
+                // Adaptive cap: starts at 20 passes but extends (up to 40)
+                // while images are still pouring in, so huge menus aren't
+                // truncated; small menus exit after two slow passes instead
+                let cap = 20;
+                for (let i = 0; i < cap; i++) {
+                    el.scrollTo(0, el.scrollHeight);
+                    // Also scroll the menu section for horizontal carousels
+                    const menuSection = document.querySelector('[data-value="Menu"]')?.parentElement;
+                    if (menuSection) menuSection.scrollLeft = menuSection.scrollWidth;
+
+                    await imagesSettled();
+
+                    // Maps lazy-loads images inside existing containers, so
+                    // scrollHeight alone can stall while images still arrive
+                    // (or jitter after they stop); require the image count to
+                    // be stable too, and every img to have finished loading,
+                    // so we don't return placeholder blur URLs. (Downloads
+                    // are aborted by the route handler, which also marks the
+                    // img complete.)
+                    const height = el.scrollHeight;
+                    const count = document.images.length;
+                    const settled = [...document.images].every(img => img.complete);
+                    if (height === lastHeight && count === lastCount && settled) {
+                        break;
+                    }
+
+                    // Sentinel Maps sometimes renders at the bottom of a feed
+                    if (document.querySelector('[aria-label*="End of list"], .end-of-results')) {
+                        break;
+                    }
+
+                    // Exit after two passes that yielded no new images;
+                    // stretch the cap while the page keeps producing them
+                    const newImages = count - lastCount;
+                    if (newImages < 1) {
+                        slowRounds++;
+                        if (slowRounds >= 2) break;
+                    } else {
+                        slowRounds = 0;
+                        if (newImages > 5 && cap < 40) cap++;
+                    }
+
+                    lastHeight = height;
+                    lastCount = count;
+                }
+            }
+        """)
+        _mark("scroll")
+
+        print("Extracting image URLs...")
+        # Filter to Google-hosted images (menu photos are typically from
+        # googleusercontent.com) and de-dup inside the page, so only the
+        # final list crosses the CDP boundary instead of every img src on
+        # the page. Set iteration preserves insertion order.
+        dom_urls = await page.evaluate("""
+            () => {
+                const out = new Set();
+                for (const img of document.images) {
+                    const url = img.src || img.currentSrc || img.getAttribute('data-src');
+                    if (url && url.startsWith('http') &&
+                            (url.includes('googleusercontent.com') ||
+                             url.includes('googleapis.com'))) {
+                        out.add(url);
+                    }
+                }
+                return [...out];
+            }
+        """)
+
+        # Union DOM extraction with network-sniffed URLs, dropping
+        # duplicates while preserving order
+        unique_images = list(dict.fromkeys([*dom_urls, *sniffed]))
+        _mark("extract")
+
+        print(f"✅ Found {len(unique_images)} unique menu image URLs")
+        return unique_images
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        # A failed scrape still reports the phases it completed
+        logger.info(
+            "scrape phase timings for %s: %s", google_maps_url, timings,
+            extra={"phase_timings": timings},
+        )
+        for phase, seconds in timings.items():
+            _PHASE_SECONDS.labels(phase=phase).observe(seconds)
+
+
+async def main():
+    import sys
+    
+    # Get URL from command line argument or use default test URL
+    if len(sys.argv) > 1:
+        google_maps_url = sys.argv[1]
+    else:
+        # Default test URL
+        google_maps_url = "https://www.google.com/maps/place/CAVA/@33.5087058,-112.0458579,17z/data=!3m1!4b1!4m6!3m5!1s0x872b0dc8ef74aa11:0x4f3ccce4e3eb8f6e!8m2!3d33.5087058!4d-112.0458579!16s%2Fg%2F11rq8nl6lt?entry=ttu&g_ep=EgoyMDI1MTEyMy4xIKXMDSoASAFQAw%3D%3D"
+        print("Usage: python scrape_menu.py <google_maps_url>")
+        print("Using default test URL...\n")
+    
+    print("=" * 80)
+    print("Google Maps Menu Scraper")
+    print("=" * 80)
+    
+    urls = await scrape_menu_images(google_maps_url)
+    
+    print("\n" + "=" * 80)
+    print(f"Results: Found {len(urls)} menu image URLs")
+    print("=" * 80)
+    
+    for i, url in enumerate(urls, 1):
+        print(f"{i}. {url}")
+    
+    if len(urls) == 0:
+        print("\n⚠️  No menu images found. Possible reasons:")
+        print("   - The place doesn't have a Menu tab")
+        print("   - The menu section has no images")
+        print("   - The page structure may have changed")
+    
+    return urls
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
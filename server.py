@@ -1,12 +1,90 @@
+import asyncio
+import json
 import os
-from typing import List
+import re
+from typing import List, Optional
 
+import redis.asyncio as aioredis
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from scrape_menu import scrape_menu_images
+from playwright.async_api import async_playwright
+from prometheus_fastapi_instrumentator import Instrumentator
+from pydantic import BaseModel, Field, HttpUrl
+from scrape_menu import CHROMIUM_ARGS, scrape_menu_images, scrape_menu_images_batch
 import uvicorn
 
+# Menus change slowly (hours/days), so re-scraping the same place within an
+# hour is pure waste. Hits return in microseconds instead of a full scrape.
+# Empty results are cached separately with a shorter TTL so we don't hammer
+# Maps for places without menus, but still retry them reasonably soon.
+#
+# When REDIS_URL is set the cache lives in Redis, surviving restarts and
+# shared across Uvicorn workers; otherwise it falls back to these
+# in-process TTLCaches.
+MENU_TTL = 3600
+NO_MENU_TTL = 600
+# Bump the version tag when the cached value schema changes so stale
+# entries invalidate cleanly
+_CACHE_VERSION = "v1"
+
+_menu_cache = TTLCache(maxsize=1024, ttl=MENU_TTL)
+_no_menu_cache = TTLCache(maxsize=1024, ttl=NO_MENU_TTL)
+_cache_lock = asyncio.Lock()
+_redis: Optional[aioredis.Redis] = None
+
+
+def _redis_key(key: str) -> str:
+    return f"{_CACHE_VERSION}:menu:{key}"
+
+# Place identity lives in the "1s0x...:0x..." data segment or an explicit
+# place_id/query_place_id param; everything else (viewport, entry=ttu,
+# g_ep=...) varies between shares of the same place
+_PLACE_ID_RE = re.compile(r"1s(0x[0-9a-f]+:0x[0-9a-f]+)|(?:query_)?place_id=([^&]+)")
+
+
+def normalize_place_url(url: str) -> str:
+    """Reduce a Google Maps URL to a stable cache key for the place."""
+    match = _PLACE_ID_RE.search(url)
+    if match:
+        return match.group(1) or match.group(2)
+    return url
+
+
+async def cache_get(key: str) -> Optional[List[str]]:
+    """Return cached image URLs for a place key, or None on a miss."""
+    if _redis is not None:
+        try:
+            cached = await _redis.get(_redis_key(key))
+        except Exception as e:
+            print(f"⚠️  Redis read failed, treating as miss: {e}")
+            return None
+        return json.loads(cached) if cached is not None else None
+
+    async with _cache_lock:
+        if key in _menu_cache:
+            return _menu_cache[key]
+        if key in _no_menu_cache:
+            return _no_menu_cache[key]
+    return None
+
+
+async def cache_put(key: str, urls: List[str]) -> None:
+    """Store scrape results, using the short TTL for empty results."""
+    if _redis is not None:
+        ttl = MENU_TTL if urls else NO_MENU_TTL
+        try:
+            await _redis.setex(_redis_key(key), ttl, json.dumps(urls))
+        except Exception as e:
+            print(f"⚠️  Redis write failed: {e}")
+        return
+
+    async with _cache_lock:
+        if urls:
+            _menu_cache[key] = urls
+        else:
+            _no_menu_cache[key] = urls
+
 app = FastAPI(
     title="Google Maps Menu Scraper API",
     description="API to scrape menu images from Google Maps place listings",
@@ -22,6 +100,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Expose /metrics with per-endpoint latency histograms plus the
+# scrape_phase_seconds histogram recorded by scrape_menu
+Instrumentator().instrument(app).expose(app)
+
+
+@app.on_event("startup")
+async def startup():
+    """Launch a single long-lived Chromium shared by all requests.
+
+    Launching a browser costs 1-2s; spawning a BrowserContext on an
+    already-running browser is nearly free, so each request only pays
+    for its own context.
+    """
+    app.state.playwright = await async_playwright().start()
+    app.state.browser = await app.state.playwright.chromium.launch(
+        headless=True, args=CHROMIUM_ARGS
+    )
+
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        global _redis
+        _redis = aioredis.from_url(redis_url, decode_responses=True)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Tear down the shared browser, the Playwright driver, and Redis."""
+    await app.state.browser.close()
+    await app.state.playwright.stop()
+    if _redis is not None:
+        await _redis.aclose()
+
 
 class ScrapeRequest(BaseModel):
     url: HttpUrl
@@ -33,6 +143,15 @@ class ScrapeResponse(BaseModel):
     menu_image_urls: List[str]
 
 
+class BatchRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=20)
+    max_concurrency: int = Field(5, ge=1, le=10)
+
+
+class BatchResponse(BaseModel):
+    results: List[ScrapeResponse]
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -51,13 +170,19 @@ async def scrape_menu(req: ScrapeRequest):
         "menu_image_urls": ["https://...", "https://..."]
     }
     """
-    try:
-        urls = await scrape_menu_images(str(req.url))
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Scrape failed: {str(e)}"
-        )
+    key = normalize_place_url(str(req.url))
+    cached = await cache_get(key)
+    if cached is not None:
+        urls = cached
+    else:
+        try:
+            urls = await scrape_menu_images(str(req.url), browser=app.state.browser)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Scrape failed: {str(e)}"
+            )
+        await cache_put(key, urls)
 
     # Set status based on results
     status = "ok"
@@ -71,6 +196,58 @@ async def scrape_menu(req: ScrapeRequest):
     )
 
 
+@app.post("/scrape-menu-batch", response_model=BatchResponse)
+async def scrape_menu_batch(req: BatchRequest):
+    """
+    Scrape menu images from several Google Maps place URLs concurrently.
+
+    All URLs share one BrowserContext on the shared browser and run as
+    parallel tabs, which costs far less memory than a context per URL.
+    max_concurrency bounds how many tabs scrape at once so Chromium isn't
+    overloaded. A failed URL yields status "error" for that entry instead
+    of failing the whole batch.
+    """
+    urls = [str(u) for u in req.urls]
+    keys = [normalize_place_url(u) for u in urls]
+    results = {}
+
+    # Serve what we can from the cache; only scrape the misses
+    misses = []
+    for url, key in zip(urls, keys):
+        cached = await cache_get(key)
+        if cached is not None:
+            results[url] = cached
+        else:
+            misses.append(url)
+
+    if misses:
+        scraped = await scrape_menu_images_batch(
+            misses, app.state.browser, max_concurrency=req.max_concurrency
+        )
+        for url, result in zip(misses, scraped):
+            results[url] = result
+            if not isinstance(result, Exception):
+                await cache_put(normalize_place_url(url), result)
+
+    responses = []
+    for url in urls:
+        result = results[url]
+        if isinstance(result, Exception):
+            responses.append(ScrapeResponse(
+                status="error",
+                place_url=url,
+                menu_image_urls=[],
+            ))
+        else:
+            responses.append(ScrapeResponse(
+                status="ok" if result else "no_menu_found",
+                place_url=url,
+                menu_image_urls=result,
+            ))
+
+    return BatchResponse(results=responses)
+
+
 if __name__ == "__main__":
     # Read PORT from environment variable (for Render.com, Heroku, etc.)
     # Default to 8000 for local development
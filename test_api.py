@@ -1,25 +1,47 @@
-import requests
-import json
-
-# Test the API endpoint
-url = "http://localhost:8000/scrape-menu"
-test_url = "https://www.google.com/maps/place/CAVA/@33.5087058,-112.0458579,17z/data=!3m1!4b1!4m6!3m5!1s0x872b0dc8ef74aa11:0x4f3ccce4e3eb8f6e!8m2!3d33.5087058!4d-112.0458579!16s%2Fg%2F11rq8nl6lt?entry=ttu&g_ep=EgoyMDI1MTEyMy4xIKXMDSoASAFQAw%3D%3D"
-
-payload = {"url": test_url}
-
-print("Testing FastAPI server...")
-print(f"URL: {url}")
-print(f"Payload: {json.dumps(payload, indent=2)}")
-print("\nSending request...")
-
-try:
-    response = requests.post(url, json=payload, timeout=120)
-    print(f"\nStatus Code: {response.status_code}")
-    print(f"\nResponse JSON:")
-    print(json.dumps(response.json(), indent=2))
-except requests.exceptions.ConnectionError:
-    print("\n❌ Connection refused. Make sure the server is running:")
-    print("   python server.py")
-except Exception as e:
-    print(f"\n❌ Error: {e}")
-
+import asyncio
+import json
+import time
+
+import httpx
+
+# Test the API endpoint
+url = "http://localhost:8000/scrape-menu"
+test_urls = [
+    "https://www.google.com/maps/place/CAVA/@33.5087058,-112.0458579,17z/data=!3m1!4b1!4m6!3m5!1s0x872b0dc8ef74aa11:0x4f3ccce4e3eb8f6e!8m2!3d33.5087058!4d-112.0458579!16s%2Fg%2F11rq8nl6lt?entry=ttu&g_ep=EgoyMDI1MTEyMy4xIKXMDSoASAFQAw%3D%3D",
+    "https://www.google.com/maps/search/?api=1&query=CAVA&query_place_id=ChIJEap078gNK4cRbo_r4-TMPE8",
+]
+
+
+async def main():
+    print("Testing FastAPI server...")
+    print(f"URL: {url}")
+    print(f"Sending {len(test_urls)} concurrent requests...")
+
+    start = time.perf_counter()
+    try:
+        # HTTP/2 multiplexes the concurrent requests over one connection
+        async with httpx.AsyncClient(timeout=120, http2=True) as client:
+            responses = await asyncio.gather(
+                *[client.post(url, json={"url": u}) for u in test_urls],
+                return_exceptions=True,
+            )
+    except httpx.ConnectError:
+        print("\n❌ Connection refused. Make sure the server is running:")
+        print("   python server.py")
+        return
+    elapsed = time.perf_counter() - start
+
+    for test_url, response in zip(test_urls, responses):
+        print(f"\n--- {test_url}")
+        if isinstance(response, Exception):
+            print(f"❌ Error: {response}")
+            continue
+        print(f"Status Code: {response.status_code}")
+        print(f"Response JSON:")
+        print(json.dumps(response.json(), indent=2))
+
+    print(f"\nTotal wall-clock for {len(test_urls)} requests: {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
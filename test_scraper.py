@@ -1,20 +1,25 @@
-import requests
-import json
-import time
-
-# Wait for server to be ready
-time.sleep(2)
-
-url = "http://localhost:8000/scrape-menu"
-test_url = "https://www.google.com/maps/search/?api=1&query=CAVA&query_place_id=ChIJEap078gNK4cRbo_r4-TMPE8"
-
-payload = {"url": test_url}
-
-print(f"Testing with URL: {test_url}")
-print("Sending request...")
-
-response = requests.post(url, json=payload, timeout=120)
-
-print(f"\nStatus Code: {response.status_code}")
-print(f"Response: {json.dumps(response.json(), indent=2)}")
-
+import asyncio
+import json
+
+import httpx
+
+url = "http://localhost:8000/scrape-menu"
+test_url = "https://www.google.com/maps/search/?api=1&query=CAVA&query_place_id=ChIJEap078gNK4cRbo_r4-TMPE8"
+
+
+async def main():
+    # Wait for server to be ready
+    await asyncio.sleep(2)
+
+    print(f"Testing with URL: {test_url}")
+    print("Sending request...")
+
+    async with httpx.AsyncClient(timeout=120, http2=True) as client:
+        response = await client.post(url, json={"url": test_url})
+
+    print(f"\nStatus Code: {response.status_code}")
+    print(f"Response: {json.dumps(response.json(), indent=2)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())